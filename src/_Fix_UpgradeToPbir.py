@@ -10,109 +10,97 @@ from sempy_labs._helper_functions import (
     _base_api,
 )
 from sempy._utils._log import log
+from sempy.fabric.exceptions import FabricHTTPException
+from sempy_labs.report._pbir_poll import (
+    _TIME_LIMIT,
+    _find_report_in_listing,
+    _parse,
+    _poll_reports_for_pbir,
+    _poll_reports_for_pbir_async,
+)
 import sempy_labs._icons as icons
+import asyncio
 import time
 
-# ---------------------------------------------------------------------------
-# Constants
-# ---------------------------------------------------------------------------
-_POLL_TIME_LIMIT = 60  # seconds to poll for server-side format conversion
-_TIME_BETWEEN_REQUESTS = 3  # seconds between status checks
+# Status icons bound once at import instead of a module attribute lookup
+# per log line
+_ICON_INP = icons.in_progress
+_ICON_OK = icons.green_dot
+_ICON_WARN = icons.warning
+_ICON_ERR = icons.red_dot
+_ICON_SCAN = icons.yellow_dot
 
 
 # ---------------------------------------------------------------------------
-# Helper: Poll the reports API until the format flips to PBIR
+# Helper: Report the upgrade outcome
 # ---------------------------------------------------------------------------
-def _check_upgrade_status(
-    url: str, report_id: str, workspace_name: str,
-    start_time: float,
+def _report_upgrade_status(
+    report_id: str, verified: dict, workspace_name: str, start_time: float,
 ) -> bool:
     """
-    Polls ``GET /v1.0/myorg/groups/{ws}/reports`` until the report
-    shows ``format == "PBIR"`` or the time limit is exceeded.
-
-    Returns True if PBIR was verified, False otherwise.
+    Prints the outcome of a status check started at ``start_time``; used by
+    the sync and async fixers.  Returns True if PBIR was verified.
     """
 
-    poll_count = 0
-    verified_name = None
-
-    while time.time() - start_time < _POLL_TIME_LIMIT:
-        poll_count += 1
-        elapsed = int(time.time() - start_time)
-        print(
-            f"{icons.in_progress} Poll #{poll_count} — "
-            f"{elapsed}s / {_POLL_TIME_LIMIT}s elapsed..."
-        )
-
-        response = _base_api(request=url, client="fabric_sp")
-
-        for rpt in response.json().get("value", []):
-            if rpt.get("id") == report_id:
-                if rpt.get("format") == "PBIR":
-                    verified_name = rpt.get("name")
-                break
-
-        if verified_name:
-            break
-
-        time.sleep(_TIME_BETWEEN_REQUESTS)
-
     elapsed = int(time.time() - start_time)
-    if verified_name:
+    if report_id in verified:
         print(
-            f"{icons.green_dot} The '{verified_name}' report in the "
+            f"{_ICON_OK} The '{verified[report_id]}' report in the "
             f"'{workspace_name}' workspace has been upgraded to PBIR format "
             f"({elapsed}s)."
         )
         return True
     else:
         print(
-            f"{icons.warning} The report in the "
+            f"{_ICON_WARN} The report in the "
             f"'{workspace_name}' workspace could not be verified as PBIR "
-            f"within {_POLL_TIME_LIMIT}s.  It may still be processing — "
+            f"within {elapsed}s.  It may still be processing — "
             f"please check the workspace manually."
         )
         return False
 
 
 # ---------------------------------------------------------------------------
-# Main fixer function
+# Helper: Poll the reports API until the format flips to PBIR
 # ---------------------------------------------------------------------------
-@log
-def fix_upgrade_to_pbir(
-    report: str | UUID,
-    page_name: Optional[str] = None,
-    workspace: Optional[str | UUID] = None,
-    scan_only: bool = False,
+def _check_upgrade_status(
+    reports_url: str, report_id: str, workspace_name: str,
+    deadline: Optional[float] = None,
 ) -> bool:
     """
-    Upgrades a report from PBIRLegacy format to PBIR format.
+    Polls ``GET /v1.0/myorg/groups/{ws}/reports/{id}`` until the report
+    shows ``format == "PBIR"`` or the time limit (or ``deadline``) is hit.
 
-    Uses a pure REST approach: retrieves the report definition via the
-    Fabric Items API (``getDefinition``) and pushes it back via
-    ``updateDefinition``.  The server-side processing converts the
-    definition to the workspace's current format (PBIR).
+    The first poll is issued immediately — small reports are usually
+    converted by the time ``updateDefinition`` returns.  Polling itself
+    (backoff, ETags, pooled client) lives in ``_pbir_poll``.
 
-    In scan mode the function only reports the current format.
+    Returns True if PBIR was verified, False otherwise.
+    """
 
-    Parameters
-    ----------
-    report : str | uuid.UUID
-        Name or ID of the report.
-    page_name : str, default=None
-        Unused — accepted for interface consistency with other report fixers.
-    workspace : str | uuid.UUID, default=None
-        The Fabric workspace name or ID.
-        Defaults to None which resolves to the workspace of the attached lakehouse
-        or if no lakehouse attached, resolves to the workspace of the notebook.
-    scan_only : bool, default=False
-        If True, only reports the current format without upgrading.
+    start_time = time.time()
+    _, verified, _ = _poll_reports_for_pbir(
+        reports_url, [report_id], time_limit=_TIME_LIMIT, verbose=True,
+        deadline=deadline,
+    )
+    return _report_upgrade_status(report_id, verified, workspace_name, start_time)
 
-    Returns
-    -------
-    bool
-        True if the report is (or was upgraded to) PBIR format, False otherwise.
+
+# ---------------------------------------------------------------------------
+# Helper: Everything up to the status poll
+# ---------------------------------------------------------------------------
+def _start_upgrade(
+    report: str | UUID,
+    workspace: Optional[str | UUID],
+    scan_only: bool,
+) -> tuple[Optional[bool], Optional[tuple[str, str, str]]]:
+    """
+    Checks the report format and, in fix mode, pushes the definition back
+    via ``updateDefinition``.  Shared by the sync and async fixers.
+
+    Returns ``(result, None)`` when done without polling, or
+    ``(None, (reports_url, report_id, workspace_name))`` when the format
+    change still has to be verified.
     """
 
     workspace_name, workspace_id = resolve_workspace_name_and_id(workspace)
@@ -120,38 +108,44 @@ def fix_upgrade_to_pbir(
         item=report, type="Report", workspace=workspace_id
     )
 
+    target_id = str(rpt_id)
+
     # Get report metadata to check current format
     reports_url = f"/v1.0/myorg/groups/{workspace_id}/reports"
-    response = _base_api(request=reports_url, client="fabric_sp")
-
-    rpt_format = None
-    for rpt in response.json().get("value", []):
-        if rpt.get("id") == str(rpt_id):
-            rpt_format = rpt.get("format")
-            break
+    report_url = f"{reports_url}/{target_id}"
+    try:
+        rpt = _parse(_base_api(request=report_url, client="fabric_sp"))
+    except FabricHTTPException as e:
+        # Only a missing/rejected per-report endpoint falls back to the
+        # workspace listing (stream-parsed when ijson is installed) — auth,
+        # throttling and other errors propagate as before
+        if e.response.status_code not in (400, 404):
+            raise
+        rpt = _find_report_in_listing(reports_url, target_id)
+    rpt_format = rpt.get("format") if rpt else None
 
     if rpt_format is None:
         print(
-            f"{icons.red_dot} Could not find report '{rpt_name}' in the "
+            f"{_ICON_ERR} Could not find report '{rpt_name}' in the "
             f"'{workspace_name}' workspace."
         )
-        return False
+        return False, None
 
     # Already PBIR
     if rpt_format == "PBIR":
         print(
-            f"{icons.green_dot} Report '{rpt_name}' is already in PBIR format "
+            f"{_ICON_OK} Report '{rpt_name}' is already in PBIR format "
             f"— no upgrade needed."
         )
-        return True
+        return True, None
 
     # Not PBIRLegacy — cannot upgrade
     if rpt_format != "PBIRLegacy":
         print(
-            f"{icons.red_dot} Report '{rpt_name}' is in '{rpt_format}' format. "
+            f"{_ICON_ERR} Report '{rpt_name}' is in '{rpt_format}' format. "
             f"Only PBIRLegacy reports can be upgraded to PBIR."
         )
-        return False
+        return False, None
 
     # PBIRLegacy → eligible for upgrade
     if scan_only:
@@ -168,32 +162,32 @@ def fix_upgrade_to_pbir(
             visual_count = sum(1 for p in scan_parts if p.get("path", "").endswith("/visual.json"))
             if visual_count > 100:
                 print(
-                    f"{icons.yellow_dot} Report '{rpt_name}' is in PBIRLegacy format "
+                    f"{_ICON_SCAN} Report '{rpt_name}' is in PBIRLegacy format "
                     f"— eligible for upgrade to PBIR."
                 )
                 print(
-                    f"{icons.warning} Report has {visual_count} visuals. "
+                    f"{_ICON_WARN} Report has {visual_count} visuals. "
                     f"PBIR conversion may fail for reports with more than 100 visuals."
                 )
-                return True
+                return True, None
         except Exception:
             pass  # If getDefinition fails in scan, just report eligibility
 
         print(
-            f"{icons.yellow_dot} Report '{rpt_name}' is in PBIRLegacy format "
+            f"{_ICON_SCAN} Report '{rpt_name}' is in PBIRLegacy format "
             f"— eligible for upgrade to PBIR."
         )
-        return True  # scan mode: report is eligible, not a failure
+        return True, None  # scan mode: report is eligible, not a failure
 
     # ------------------------------------------------------------------
     # Fix mode — perform the upgrade via REST round-trip
     # ------------------------------------------------------------------
     print(
-        f"{icons.in_progress} Upgrading '{rpt_name}' from PBIRLegacy to PBIR..."
+        f"{_ICON_INP} Upgrading '{rpt_name}' from PBIRLegacy to PBIR..."
     )
 
     # Step 1: Get the current report definition (raw base64 parts)
-    print(f"{icons.in_progress} Retrieving report definition...")
+    print(f"{_ICON_INP} Retrieving report definition...")
     try:
         result = _base_api(
             request=f"/v1/workspaces/{workspace_id}/reports/{rpt_id}/getDefinition",
@@ -204,22 +198,22 @@ def fix_upgrade_to_pbir(
         )
     except Exception as e:
         print(
-            f"{icons.red_dot} Failed to get report definition for "
+            f"{_ICON_ERR} Failed to get report definition for "
             f"'{rpt_name}': {e}"
         )
-        return False
+        return False, None
 
     parts = result.get("definition", {}).get("parts", [])
     if not parts:
         print(
-            f"{icons.red_dot} Report definition for '{rpt_name}' returned "
+            f"{_ICON_ERR} Report definition for '{rpt_name}' returned "
             f"no parts — cannot upgrade."
         )
-        return False
+        return False, None
 
     part_paths = [p.get("path") for p in parts]
     print(
-        f"{icons.in_progress} Retrieved {len(parts)} definition "
+        f"{_ICON_INP} Retrieved {len(parts)} definition "
         f"part(s): {', '.join(part_paths)}"
     )
 
@@ -227,7 +221,7 @@ def fix_upgrade_to_pbir(
     visual_count = sum(1 for p in part_paths if p and p.endswith("/visual.json"))
     if visual_count > 100:
         print(
-            f"{icons.warning} Report '{rpt_name}' has {visual_count} visuals. "
+            f"{_ICON_WARN} Report '{rpt_name}' has {visual_count} visuals. "
             f"PBIR conversion may fail for reports with more than 100 visuals. "
             f"Proceeding anyway — check the result manually."
         )
@@ -236,7 +230,7 @@ def fix_upgrade_to_pbir(
     # The server processes the definition and stores it in the
     # workspace's current format.  If the workspace has the
     # "enhanced report format" (PBIR) enabled this converts the report.
-    print(f"{icons.in_progress} Pushing definition back via updateDefinition...")
+    print(f"{_ICON_INP} Pushing definition back via updateDefinition...")
     try:
         _base_api(
             request=f"/v1/workspaces/{workspace_id}/reports/{rpt_id}/updateDefinition",
@@ -248,14 +242,102 @@ def fix_upgrade_to_pbir(
         )
     except Exception as e:
         print(
-            f"{icons.red_dot} updateDefinition failed for '{rpt_name}': {e}"
+            f"{_ICON_ERR} updateDefinition failed for '{rpt_name}': {e}"
         )
-        return False
+        return False, None
+
+    print(f"{_ICON_INP} updateDefinition completed — checking format...")
+
+    # Step 3 (done by the caller): poll for the format change
+    return None, (reports_url, target_id, workspace_name)
+
+
+# ---------------------------------------------------------------------------
+# Main fixer function
+# ---------------------------------------------------------------------------
+@log
+def fix_upgrade_to_pbir(
+    report: str | UUID,
+    page_name: Optional[str] = None,
+    workspace: Optional[str | UUID] = None,
+    scan_only: bool = False,
+    deadline: Optional[float] = None,
+) -> bool:
+    """
+    Upgrades a report from PBIRLegacy format to PBIR format.
+
+    Uses a pure REST approach: retrieves the report definition via the
+    Fabric Items API (``getDefinition``) and pushes it back via
+    ``updateDefinition``.  The server-side processing converts the
+    definition to the workspace's current format (PBIR).
+
+    In scan mode the function only reports the current format.
+
+    Parameters
+    ----------
+    report : str | uuid.UUID
+        Name or ID of the report.
+    page_name : str, default=None
+        Unused — accepted for interface consistency with other report fixers.
+    workspace : str | uuid.UUID, default=None
+        The Fabric workspace name or ID.
+        Defaults to None which resolves to the workspace of the attached lakehouse
+        or if no lakehouse attached, resolves to the workspace of the notebook.
+    scan_only : bool, default=False
+        If True, only reports the current format without upgrading.
+    deadline : float, default=None
+        Absolute ``time.time()`` after which the status poll gives up, even
+        if the poll time limit has not been reached.  Lets batch callers
+        share one time budget across many reports.
+
+    Returns
+    -------
+    bool
+        True if the report is (or was upgraded to) PBIR format, False otherwise.
+    """
 
-    print(f"{icons.in_progress} updateDefinition completed — checking format...")
+    result, poll_target = _start_upgrade(report, workspace, scan_only)
+    if poll_target is None:
+        return result
 
     # Step 3: Poll for format change
-    upgrade_start = time.time()
-    return _check_upgrade_status(
-        reports_url, str(rpt_id), workspace_name, start_time=upgrade_start
+    return _check_upgrade_status(*poll_target, deadline=deadline)
+
+
+async def fix_upgrade_to_pbir_async(
+    report: str | UUID,
+    page_name: Optional[str] = None,
+    workspace: Optional[str | UUID] = None,
+    scan_only: bool = False,
+    deadline: Optional[float] = None,
+) -> bool:
+    """
+    Async variant of ``fix_upgrade_to_pbir`` with the same parameters.
+
+    The REST round-trip runs in a worker thread and the status poll waits
+    with ``asyncio.sleep``, so a driver can upgrade many reports
+    concurrently on one event loop and cancel them like any other task::
+
+        results = await asyncio.gather(
+            *(fix_upgrade_to_pbir_async(r, workspace=ws, deadline=time.time() + 90)
+              for r in reports)
+        )
+
+    In a notebook use top-level ``await`` — the kernel's event loop is
+    already running, so ``asyncio.run`` is not available there.
+    """
+
+    result, poll_target = await asyncio.to_thread(
+        _start_upgrade, report, workspace, scan_only
+    )
+    if poll_target is None:
+        return result
+
+    # Same check as _check_upgrade_status, awaiting the async poller
+    reports_url, report_id, workspace_name = poll_target
+    start_time = time.time()
+    _, verified, _ = await _poll_reports_for_pbir_async(
+        reports_url, [report_id], time_limit=_TIME_LIMIT, verbose=True,
+        deadline=deadline,
     )
+    return _report_upgrade_status(report_id, verified, workspace_name, start_time)
@@ -9,14 +9,20 @@ from sempy._utils._log import log
 @log
 def generate_embed_token(dataset_ids: List[UUID], report_ids: List[UUID]):
 
-    if not isinstance(dataset_ids, list):
-        dataset_ids = [dataset_ids]
-    if not isinstance(report_ids, list):
-        report_ids = [report_ids]
+    # Normalize once: accept a single id or a list/tuple of ids
+    if not isinstance(dataset_ids, (list, tuple)):
+        dataset_ids = (dataset_ids,)
+    if not isinstance(report_ids, (list, tuple)):
+        report_ids = (report_ids,)
 
     payload = {
-        "datasets": [{"id": dataset_id} for dataset_id in dataset_ids],
-        "reports": [{"id": report_id, "allowEdit": True} for report_id in report_ids],
+        "datasets": [
+            {"id": d if isinstance(d, str) else str(d)} for d in dataset_ids
+        ],
+        "reports": [
+            {"id": r if isinstance(r, str) else str(r), "allowEdit": True}
+            for r in report_ids
+        ],
     }
 
     response = _base_api(
@@ -0,0 +1,378 @@
+# Shared PBIR status polling
+# Polls the Power BI reports API until upgraded reports show format PBIR.
+# Used by fix_upgrade_to_pbir (REST round-trip) and upgrade_to_pbir (embed).
+
+from typing import Iterable, Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from sempy.fabric.exceptions import FabricHTTPException
+from sempy_labs._helper_functions import FabricDefaultCredential
+import sempy.fabric as fabric
+import sempy_labs._authentication as auth
+import sempy_labs._icons as icons
+import asyncio
+import random
+import time
+
+try:
+    from orjson import loads as _loads
+except ImportError:  # orjson is optional — fall back to the stdlib parser
+    from json import loads as _loads
+
+try:
+    import ijson  # optional — lets listing lookups stop at the matching report
+except ImportError:
+    ijson = None
+
+
+# ---------------------------------------------------------------------------
+# Constants
+# ---------------------------------------------------------------------------
+_TIME_LIMIT = 60  # default seconds to poll for server-side format conversion
+_POLL_BASE_DELAY = 0.3  # seconds — lower bound of every backoff delay
+_POLL_MAX_DELAY = 5.0  # seconds — upper bound of the backoff window
+_POLL_DELAY_RATE = 1.5  # growth factor of the backoff window per poll
+_MAX_POLL_WORKERS = 8  # concurrent per-report status requests
+_POLL_SELECT = "id,name,format"  # the only fields a status poll needs
+
+# Poll progress line, pre-built with its icon; filled with %-formatting
+_POLL_LOG = icons.in_progress + " Poll #%d — %ds / %ss elapsed..."
+
+# Cleared the first time the API rejects ``$select`` — polls then request
+# the full report object.
+_select_supported = True
+
+
+# ---------------------------------------------------------------------------
+# Helper: Parse a REST response body
+# ---------------------------------------------------------------------------
+def _parse(response) -> dict:
+    """Parses the raw response bytes — with orjson when it is installed."""
+    return _loads(response.content)
+
+
+# ---------------------------------------------------------------------------
+# Helper: Pooled REST client for status polls
+# ---------------------------------------------------------------------------
+@lru_cache(maxsize=4)
+def _rest_client(token_provider=None):
+    """
+    Returns a cached ``FabricRestClient`` per token provider, built like the
+    ``client="fabric_sp"`` client of ``_base_api``.  The client holds one
+    ``requests.Session``, so consecutive polls (also from worker threads)
+    reuse pooled keep-alive connections instead of a fresh TLS handshake
+    per request.
+    """
+
+    return fabric.FabricRestClient(
+        credential=token_provider or FabricDefaultCredential()
+    )
+
+
+def _current_client():
+    """
+    Returns the pooled client for the active service principal context.
+
+    Must be called in the caller's thread: ``ThreadPoolExecutor`` workers do
+    not inherit ``auth.token_provider`` (a ContextVar), so the client is
+    resolved once here and handed to the workers.
+    """
+
+    return _rest_client(auth.token_provider.get())
+
+
+def _get_json(
+    client, url: str, etag: Optional[tuple] = None, select: Optional[str] = None,
+) -> tuple[Optional[dict], Optional[tuple]]:
+    """
+    GETs ``url`` through ``client`` (see ``_current_client``) and parses
+    the body.
+
+    ``etag`` is the opaque validator returned by an earlier call — the
+    ``(request_url, ETag)`` pair of that response.  It is only sent
+    (``If-None-Match``) to the same request URL, so the ETag of a narrowed
+    response is never used for the full representation; a ``304 Not
+    Modified`` returns ``(None, etag)`` without parsing.  Otherwise returns
+    the parsed body and the new validator.
+
+    ``select`` narrows the response via ``$select``.  On a 400 the request
+    is repeated without it, and only if that succeeds is ``$select`` turned
+    off for later calls — any other 400 propagates unchanged.
+    """
+
+    global _select_supported
+
+    def _get(request_url):
+        # sempy's client merges these into its default headers, so never None
+        headers = (
+            {"If-None-Match": etag[1]} if etag and etag[0] == request_url else {}
+        )
+        return request_url, client.get(request_url, headers=headers)
+
+    if select and _select_supported:
+        try:
+            request_url, response = _get(f"{url}?$select={select}")
+        except FabricHTTPException as e:
+            # sempy's response hook raises for any status >= 400
+            if e.response.status_code != 400:
+                raise
+            request_url, response = _get(url)
+            # The full GET succeeded, so the 400 was about $select
+            _select_supported = False
+    else:
+        request_url, response = _get(url)
+    if response.status_code == 304:
+        return None, etag
+    if response.status_code != 200:
+        raise FabricHTTPException(response)
+    new_etag = response.headers.get("ETag")
+    return _parse(response), ((request_url, new_etag) if new_etag else None)
+
+
+def _find_report_in_listing(reports_url: str, report_id: str) -> Optional[dict]:
+    """
+    Looks ``report_id`` up in the ``GET {reports_url}`` workspace listing.
+    Fallback for when the per-report endpoint cannot be used.
+
+    With ``ijson`` installed the body is stream-parsed and reading stops at
+    the matching record, so large listings are never fully materialized;
+    otherwise the whole listing is parsed.  Returns None if not found.
+    """
+
+    response = _current_client().get(reports_url, stream=True)
+    try:
+        if response.status_code != 200:
+            raise FabricHTTPException(response)
+        if ijson is not None:
+            response.raw.decode_content = True  # let urllib3 undo gzip
+            records = ijson.items(response.raw, "value.item")
+        else:
+            records = _parse(response).get("value", [])
+        for rpt in records:
+            if rpt.get("id") == report_id:
+                return rpt
+        return None
+    finally:
+        response.close()
+
+
+# ---------------------------------------------------------------------------
+# Helper: Truncated exponential backoff with jitter
+# ---------------------------------------------------------------------------
+def _next_delay(
+    attempt: int,
+    base: float = 0.5,
+    cap: float = 5.0,
+    rate: float = 1.5,
+) -> float:
+    """
+    Returns a random delay between ``base`` and ``base * rate ** attempt``
+    (truncated at ``cap``), so that early re-polls happen quickly and later
+    ones back off.
+    """
+
+    return random.uniform(base, min(cap, base * rate ** attempt))
+
+
+# ---------------------------------------------------------------------------
+# Helpers: Single poll step shared by the sync and async pollers
+# ---------------------------------------------------------------------------
+def _get_report(
+    client, reports_url: str, rpt_id: str, etag: Optional[tuple],
+) -> tuple[Optional[dict], Optional[tuple]]:
+    """Conditional, narrowed GET of one report (see ``_get_json``)."""
+
+    return _get_json(client, f"{reports_url}/{rpt_id}", etag, select=_POLL_SELECT)
+
+
+def _end_time(time_limit: float, deadline: Optional[float]) -> float:
+    """Absolute ``time.time()`` at which polling stops."""
+
+    end_time = time.time() + time_limit
+    return end_time if deadline is None else min(end_time, deadline)
+
+
+def _record_results(
+    pending: list, results: Iterable, etags: dict,
+    latest: dict, verified: dict, unverified: dict,
+) -> None:
+    """Moves reports that now show PBIR from ``unverified`` to ``verified``."""
+
+    for (rpt_id, _), (rpt, etag) in zip(pending, results):
+        # 304: unchanged since the last poll, so still not PBIR
+        if rpt is None:
+            continue
+        etags[rpt_id] = etag
+        latest[rpt_id] = rpt
+        rpt_name = rpt.get("name")
+        if rpt.get("format") == "PBIR":
+            del unverified[rpt_id]
+            verified[rpt_id] = rpt_name
+        else:
+            unverified[rpt_id] = rpt_name
+
+
+def _backoff_delay(poll_count: int, end_time: float) -> Optional[float]:
+    """
+    Returns the delay before the next poll — never past ``end_time`` — or
+    None when the time budget is used up.
+    """
+
+    remaining = end_time - time.time()
+    if remaining <= 0:
+        return None
+    delay = _next_delay(
+        poll_count,
+        base=_POLL_BASE_DELAY,
+        cap=_POLL_MAX_DELAY,
+        rate=_POLL_DELAY_RATE,
+    )
+    return min(delay, remaining)
+
+
+# ---------------------------------------------------------------------------
+# Poll loop — written once, driven by the sync and the async poller
+# ---------------------------------------------------------------------------
+def _poll_steps(
+    report_ids: list,
+    time_limit: float,
+    verbose: bool,
+    deadline: Optional[float],
+):
+    """
+    Generator holding the whole poll loop (poll → check → stop if done →
+    back off) without doing any I/O or waiting itself.
+
+    It yields either a list of ``(report_id, etag)`` requests — the driver
+    GETs them and sends back the ``(body, etag)`` results in the same order
+    — or a float delay the driver waits for before sending ``None``.  The
+    generator returns ``(latest, verified, unverified)``.
+    """
+
+    unverified = dict.fromkeys(report_ids)
+    verified = {}
+    latest = {}
+    etags = {}
+    start_time = time.time()
+    end_time = _end_time(time_limit, deadline)
+    poll_count = 0
+
+    while unverified:
+        poll_count += 1
+        if verbose:
+            elapsed = int(time.time() - start_time)
+            print(_POLL_LOG % (poll_count, elapsed, int(end_time - start_time)))
+
+        pending = [(i, etags.get(i)) for i in unverified]
+        results = yield pending
+        _record_results(pending, results, etags, latest, verified, unverified)
+
+        if not unverified:
+            break
+
+        delay = _backoff_delay(poll_count, end_time)
+        if delay is None:
+            break
+        yield delay
+
+    return latest, verified, unverified
+
+
+def _advance(steps, value) -> tuple[bool, object]:
+    """Sends ``value`` into ``steps``; returns ``(done, step_or_result)``."""
+
+    try:
+        return False, steps.send(value)
+    except StopIteration as stop:
+        return True, stop.value
+
+
+def _poll_reports_for_pbir(
+    reports_url: str,
+    report_ids: Iterable[str],
+    time_limit: float = _TIME_LIMIT,
+    verbose: bool = False,
+    deadline: Optional[float] = None,
+) -> tuple[dict, dict, dict]:
+    """
+    Polls ``GET {reports_url}/{id}`` for each report until all of them show
+    ``format == "PBIR"`` or ``time_limit`` seconds have passed.
+
+    The first poll is issued immediately; later polls back off with jitter.
+    With several reports each poll requests them concurrently, so a poll
+    takes as long as the slowest report.  Polls are conditional (ETag) and
+    only request the fields needed for the check.
+
+    ``deadline`` is an optional absolute ``time.time()`` value; polling stops
+    at whichever of it and ``time_limit`` comes first, so a batch driver can
+    give many reports one shared time budget.
+
+    Returns ``(latest, verified, unverified)``: the most recent report object
+    per id (ids that never returned a body are missing), and id → name maps
+    of the reports that are / are not yet in PBIR format.
+    """
+
+    report_ids = list(dict.fromkeys(report_ids))
+    client = _current_client()  # resolved here — workers lack the context
+    executor = (
+        ThreadPoolExecutor(max_workers=min(_MAX_POLL_WORKERS, len(report_ids)))
+        if len(report_ids) > 1
+        else None
+    )
+
+    def _fetch(request):
+        return _get_report(client, reports_url, *request)
+
+    steps = _poll_steps(report_ids, time_limit, verbose, deadline)
+    try:
+        done, step = _advance(steps, None)
+        while not done:
+            if isinstance(step, list):
+                value = list((executor.map if executor else map)(_fetch, step))
+            else:
+                time.sleep(step)
+                value = None
+            done, step = _advance(steps, value)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    return step
+
+
+async def _poll_reports_for_pbir_async(
+    reports_url: str,
+    report_ids: Iterable[str],
+    time_limit: float = _TIME_LIMIT,
+    verbose: bool = False,
+    deadline: Optional[float] = None,
+) -> tuple[dict, dict, dict]:
+    """
+    Async variant of ``_poll_reports_for_pbir`` with the same arguments and
+    return value, driving the same ``_poll_steps`` loop.
+
+    Waits with ``asyncio.sleep`` instead of blocking a thread, so many polls
+    can run concurrently on one event loop (``asyncio.gather``) and each can
+    be cancelled like any other task.  The blocking GETs run on the loop's
+    shared default executor and reuse the pooled REST client.
+    """
+
+    report_ids = list(dict.fromkeys(report_ids))
+    client = _current_client()
+
+    steps = _poll_steps(report_ids, time_limit, verbose, deadline)
+    done, step = _advance(steps, None)
+    while not done:
+        if isinstance(step, list):
+            value = await asyncio.gather(
+                *(
+                    asyncio.to_thread(_get_report, client, reports_url, *request)
+                    for request in step
+                )
+            )
+        else:
+            await asyncio.sleep(step)
+            value = None
+        done, step = _advance(steps, value)
+
+    return step
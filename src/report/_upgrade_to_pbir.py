@@ -7,14 +7,21 @@ from sempy_labs._helper_functions import (
     _base_api,
     _create_dataframe,
 )
-from IPython.display import HTML, display
 import sempy_labs._icons as icons
-import time
+import string
 from sempy_labs.report._generate_embed_token import generate_embed_token
+from sempy_labs.report._pbir_poll import _parse, _poll_reports_for_pbir
 
+try:
+    from IPython.display import HTML, display
+except ImportError:  # not running in a notebook — embedding is unavailable
+    HTML = display = None
 
-def embed_report_save_in_edit_mode(embed_url, access_token: str) -> pd.DataFrame:
-    html = f"""
+
+# Hidden embed of the report in edit mode which saves it once rendered. Built
+# once at import; only the token and embed URL are substituted per report.
+_EMBED_SAVE_TEMPLATE = string.Template(
+    """
     <div id="reportContainer" style="height:800px;width:100%;display:none;"></div>
 
     <script src="https://cdn.jsdelivr.net/npm/powerbi-client@2.23.1/dist/powerbi.min.js"></script>
@@ -22,14 +29,14 @@ def embed_report_save_in_edit_mode(embed_url, access_token: str) -> pd.DataFrame
         var models = window['powerbi-client'].models;
 
         // Embed configuration for the report
-        var embedConfig = {{
+        var embedConfig = {
             type: 'report',
             tokenType: models.TokenType.Embed,
-            accessToken: '{access_token}',
-            embedUrl: '{embed_url}',
+            accessToken: '${access_token}',
+            embedUrl: '${embed_url}',
             permissions: models.Permissions.ReadWrite,
             viewMode: models.ViewMode.Edit
-        }};
+        };
 
         // Get the container element where the report will be embedded (hidden from user)
         var reportContainer = document.getElementById('reportContainer');
@@ -38,23 +45,39 @@ def embed_report_save_in_edit_mode(embed_url, access_token: str) -> pd.DataFrame
         var report = powerbi.embed(reportContainer, embedConfig);
 
         // Listen for the 'rendered' event to ensure the report is fully loaded
-        report.on('rendered', function() {{
+        report.on('rendered', function() {
             console.log("Report rendered successfully in background.");
 
             // Trigger save once the report is rendered
-            report.save().then(function() {{
+            report.save().then(function() {
                 console.log("Report saved successfully in background!");
-            }}).catch(function(error) {{
+            }).catch(function(error) {
                 console.error("Error saving the report:", error);
-            }});
-        }});
+            });
+        });
 
         // Error handling for embed
-        report.on('error', function(event) {{
+        report.on('error', function(event) {
             console.error("Error embedding the report:", event.detail);
-        }});
+        });
     </script>
     """
+)
+
+
+def _require_html_display():
+    if HTML is None:
+        raise ImportError(
+            f"{icons.red_dot} Upgrading to PBIR saves the report from an embedded "
+            "edit session, which requires IPython HTML display (run this in a notebook)."
+        )
+
+
+def embed_report_save_in_edit_mode(embed_url, access_token: str) -> None:
+    _require_html_display()
+    html = _EMBED_SAVE_TEMPLATE.substitute(
+        access_token=access_token, embed_url=embed_url
+    )
     display(HTML(html))
 
 
@@ -81,6 +104,8 @@ def upgrade_to_pbir(
         A pandas dataframe showing the format of all reports in the specified workspace(s) after conducting the upgrade.
     """
 
+    _require_html_display()
+
     if isinstance(workspace, (str, UUID)):
         workspace = [workspace]
     workspaces = {
@@ -103,15 +128,15 @@ def upgrade_to_pbir(
         url = f"/v1.0/myorg/groups/{workspace_id}/reports"
         response = _base_api(request=url, client="fabric_sp")
 
+        # Index the listing and collect eligible reports in a single pass
+        reports_by_id = {}
         eligible_for_upgrade = {}
+        for rpt in _parse(response).get("value", []):
+            rpt_id = rpt["id"]
+            reports_by_id[rpt_id] = rpt
+            if rpt.get("format") == "PBIRLegacy":
+                eligible_for_upgrade[rpt_id] = (rpt.get("embedUrl"), rpt.get("datasetId"))
         updated_reports = []
-        for rpt in response.json().get("value", []):
-            rpt_id = rpt.get("id")
-            rpt_format = rpt.get("format")
-            embed_url = rpt.get("embedUrl")
-            dataset_id = rpt.get("datasetId")
-            if rpt_format == "PBIRLegacy":
-                eligible_for_upgrade[rpt_id] = (embed_url, dataset_id)
 
         if report is None:
             for rpt_id, (embed_url, dataset_id) in eligible_for_upgrade.items():
@@ -125,6 +150,7 @@ def upgrade_to_pbir(
                 (rpt_name, rpt_id) = resolve_item_name_and_id(
                     item=r, type="Report", workspace=workspace_id
                 )
+                rpt_id = str(rpt_id)
                 if rpt_id in eligible_for_upgrade:
                     embed_url, dataset_id = eligible_for_upgrade[rpt_id]
                     access_token = generate_embed_token(
@@ -140,6 +166,7 @@ def upgrade_to_pbir(
             (rpt_name, rpt_id) = resolve_item_name_and_id(
                 item=report, type="Report", workspace=workspace_id
             )
+            rpt_id = str(rpt_id)
             if rpt_id in eligible_for_upgrade:
                 embed_url, dataset_id = eligible_for_upgrade[rpt_id]
                 access_token = generate_embed_token(
@@ -152,7 +179,9 @@ def upgrade_to_pbir(
                     f"{icons.warning} The {rpt_name} report in the '{workspace_name}' workspace is not eligible for upgrade."
                 )
 
-        x = check_upgrade_status(url, updated_reports, workspace_id, workspace_name)
+        x = check_upgrade_status(
+            url, updated_reports, workspace_id, workspace_name, reports_by_id
+        )
         rows.extend(x)
 
     if rows:
@@ -163,44 +192,27 @@ def upgrade_to_pbir(
 
 # Define the time limit (2 minute)
 TIME_LIMIT = 120  # seconds
-TIME_BETWEEN_REQUESTS = 2  # seconds
 
 
 # Function to check the upgrade status
-def check_upgrade_status(url, updated_reports, workspace_id, workspace_name):
-    start_time = time.time()
-    while time.time() - start_time < TIME_LIMIT:
+def check_upgrade_status(
+    url, updated_reports, workspace_id, workspace_name, reports_by_id=None
+):
+    """
+    Polls ``GET {url}/{id}`` for each updated report until all of them are in
+    PBIR format or the time limit is reached (see ``_poll_reports_for_pbir``).
+    Reports that were not updated keep the format from ``reports_by_id`` (the
+    workspace listing), which is retrieved once if not provided.
+    """
+    if reports_by_id is None:
         response = _base_api(request=url, client="fabric_sp")
-        verified_reports = {}
-        unverified_reports = {}
-
-        rows = []
-        for rpt in response.json().get("value", []):
-            rpt_id = rpt.get("id")
-            rpt_name = rpt.get("name")
-            rpt_format = rpt.get("format")
-            rows.append(
-                {
-                    "Workspace Name": workspace_name,
-                    "Workspace Id": workspace_id,
-                    "Report Name": rpt_name,
-                    "Report Id": rpt_id,
-                    "Format": rpt_format,
-                }
-            )
-
-            # Check if the report is updated and format is PBIR or not
-            if rpt_id in updated_reports and rpt_format == "PBIR":
-                verified_reports[rpt_id] = rpt_name
-            elif rpt_id in updated_reports and rpt_format != "PBIR":
-                unverified_reports[rpt_id] = rpt_name
-
-        # If there are no unverified reports, break out of the loop
-        if not unverified_reports:
-            break
+        reports_by_id = {r["id"]: r for r in _parse(response).get("value", [])}
+    reports_by_id = dict(reports_by_id)
 
-        # Wait for 2 seconds before the next request
-        time.sleep(TIME_BETWEEN_REQUESTS)
+    latest, verified_reports, unverified_reports = _poll_reports_for_pbir(
+        url, updated_reports, time_limit=TIME_LIMIT
+    )
+    reports_by_id.update(latest)
 
     for rpt_id, rpt_name in verified_reports.items():
         print(
@@ -208,8 +220,18 @@ def check_upgrade_status(url, updated_reports, workspace_id, workspace_name):
         )
 
     for rpt_id, rpt_name in unverified_reports.items():
+        rpt_name = rpt_name or reports_by_id.get(rpt_id, {}).get("name")
         print(
             f"{icons.yellow_dot} The '{rpt_name}' report within the '{workspace_name}' workspace has not been upgraded to PBIR format."
         )
 
-    return rows
+    return [
+        {
+            "Workspace Name": workspace_name,
+            "Workspace Id": workspace_id,
+            "Report Name": rpt.get("name"),
+            "Report Id": rpt_id,
+            "Format": rpt.get("format"),
+        }
+        for rpt_id, rpt in reports_by_id.items()
+    ]
@@ -12,6 +12,64 @@ from sempy_labs._helper_functions import (
 )
 from sempy_labs.tom import connect_semantic_model
 
+# Numeric values of the AMO enum Microsoft.AnalysisServices.Tabular.
+# PowerBIDataSourceVersion (PowerBI_V1 = 0, PowerBI_V2 = 1, PowerBI_V3 = 3 —
+# there is no 2), which the TMSCHEMA_MODEL DMV returns for the
+# DefaultPowerBIDataSourceVersion column.
+_DATASOURCE_VERSION_NAMES = {
+    0: "PowerBI_V1",
+    1: "PowerBI_V2",
+    3: "PowerBI_V3",
+}
+
+
+# Cached TOM enum value PowerBIDataSourceVersion.PowerBI_V3 — resolved
+# lazily so the CLR assembly is only loaded when a fix is actually applied.
+_PBIV3 = None
+
+
+def _get_pbiv3():
+    """Returns the PowerBI_V3 enum value, importing TOM on first use."""
+
+    global _PBIV3
+    if _PBIV3 is None:
+        # The model property DefaultPowerBIDataSourceVersion takes a value of
+        # the PowerBIDataSourceVersion enum (see _DATASOURCE_VERSION_NAMES)
+        import Microsoft.AnalysisServices.Tabular as TOM
+
+        _PBIV3 = TOM.PowerBIDataSourceVersion.PowerBI_V3
+    return _PBIV3
+
+
+def _get_model_property_via_dmv(
+    dataset_id: str | UUID,
+    workspace_id: str | UUID,
+    property_name: str,
+):
+    """
+    Reads a single model-level property from the ``$SYSTEM.TMSCHEMA_MODEL``
+    DMV.  This is a single lightweight query instead of opening a full TOM
+    session (which loads the whole model metadata).
+
+    Returns the raw value, or None if the DMV does not expose the property
+    or the query fails.
+    """
+
+    import sempy.fabric as fabric
+
+    try:
+        df = fabric.evaluate_dax(
+            dataset=dataset_id,
+            dax_string=f"SELECT [{property_name}] FROM $SYSTEM.TMSCHEMA_MODEL",
+            workspace=workspace_id,
+        )
+    except Exception:
+        return None
+
+    if df is None or len(df) == 0 or property_name not in df.columns:
+        return None
+    return df[property_name].iloc[0]
+
 
 @log
 def fix_default_datasource_version(
@@ -52,9 +110,41 @@ def fix_default_datasource_version(
         resolve_dataset_from_report(report=report, workspace=workspace_id)
     )
 
+    # Scan mode — read the property via the DMV and skip the TOM connection
+    # entirely; fall back to a read-only TOM session if the DMV is unavailable
+    if scan_only:
+        raw_value = _get_model_property_via_dmv(
+            dataset_id, dataset_workspace_id, "DefaultPowerBIDataSourceVersion"
+        )
+        try:
+            current_value = _DATASOURCE_VERSION_NAMES.get(int(raw_value))
+        except (TypeError, ValueError):
+            current_value = None
+
+        if current_value is None:
+            with connect_semantic_model(
+                dataset=dataset_id,
+                readonly=True,
+                workspace=dataset_workspace_id,
+            ) as tom:
+                current_value = str(tom.model.DefaultPowerBIDataSourceVersion)
+
+        if current_value == "PowerBI_V3":
+            print(
+                f"{icons.green_dot} DefaultPowerBIDataSourceVersion is already "
+                f"'PowerBI_V3' on '{dataset_name}' — no action needed."
+            )
+        else:
+            print(
+                f"{icons.yellow_dot} DefaultPowerBIDataSourceVersion is "
+                f"'{current_value}' on '{dataset_name}'. "
+                f"It would be set to 'PowerBI_V3'."
+            )
+        return
+
     with connect_semantic_model(
         dataset=dataset_id,
-        readonly=scan_only,
+        readonly=False,
         workspace=dataset_workspace_id,
     ) as tom:
 
@@ -67,28 +157,13 @@ def fix_default_datasource_version(
             )
             return
 
-        # Property is not PowerBI_V3
-        if scan_only:
-            print(
-                f"{icons.yellow_dot} DefaultPowerBIDataSourceVersion is "
-                f"'{current_value}' on '{dataset_name}'. "
-                f"It would be set to 'PowerBI_V3'."
-            )
-            return
-
         # Fix mode
         print(
             f"{icons.in_progress} Setting DefaultPowerBIDataSourceVersion to "
             f"'PowerBI_V3' on '{dataset_name}'..."
         )
 
-        # The TOM property expects the enum value from the AMO library
-        # Microsoft.AnalysisServices.Compatibility.DefaultPowerBIDataSourceVersion
-        import Microsoft.AnalysisServices.Tabular as TOM
-
-        tom.model.DefaultPowerBIDataSourceVersion = (
-            TOM.DefaultPowerBIDataSourceVersion.PowerBI_V3
-        )
+        tom.model.DefaultPowerBIDataSourceVersion = _get_pbiv3()
 
         print(
             f"{icons.green_dot} DefaultPowerBIDataSourceVersion has been set to "